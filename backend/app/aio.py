@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Optional
+
+import httpx
+
+
+# One event loop on a daemon thread for the whole process. Sync code (fetchers,
+# scheduler jobs, SSE generators) submits coroutines here instead of spinning
+# up a fresh loop per call, so the AsyncClient below and its keep-alive
+# connections survive across refreshes.
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_client: Optional[httpx.AsyncClient] = None
+_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    with _lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name="aio-loop", daemon=True)
+            _thread.start()
+        return _loop
+
+
+def run(coro_fn, *args):
+    """Run ``coro_fn(*args)`` on the shared loop and block until it finishes."""
+    loop = get_loop()
+    if _thread is threading.current_thread():
+        raise RuntimeError("aio.run() called from the shared loop itself")
+    return asyncio.run_coroutine_threadsafe(coro_fn(*args), loop).result()
+
+
+async def call(coro_fn, *args):
+    """Await ``coro_fn(*args)`` on the shared loop from any other event loop.
+
+    Coroutines that use get_client() must run on the shared loop; callers on
+    another loop (e.g. FastAPI's) await them through this bridge. Cancelling
+    the caller cancels the submitted coroutine too.
+    """
+    loop = get_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro_fn(*args)
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro_fn(*args), loop))
+
+
+def get_client() -> httpx.AsyncClient:
+    """Shared AsyncClient; only use it from coroutines running on the shared loop."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            follow_redirects=True,
+            trust_env=True,
+        )
+    return _client
+
+
+async def _aclose_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def shutdown() -> None:
+    """Close the shared client and stop the loop (app shutdown)."""
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(_aclose_client(), loop).result(timeout=5)
+    except Exception as e:
+        print(f"aio shutdown error: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+    if thread is not None:
+        thread.join(timeout=5)
+    loop.close()
@@ -1,3 +1,6 @@
+import re
+
+
 AI_KEYWORDS = {
     "ai","ml","dl","llm","transformer","gpt","bert","diffusion","rl",
     "neural","embedding","prompt","finetune","lora","rag","agent",
@@ -6,8 +9,14 @@ AI_KEYWORDS = {
 }
 
 
+# All keywords compiled into one case-insensitive alternation: a single scan of
+# the text instead of a lower() copy plus one substring search per keyword.
+_KEYWORD_RE = re.compile(
+    "|".join(re.escape(k) for k in sorted(AI_KEYWORDS, key=len, reverse=True)), re.IGNORECASE
+)
+
+
 def is_ai_related_keywords(title: str, description: str | None) -> bool:
-    text = f"{title} {description or ''}".lower()
-    return any(k in text for k in AI_KEYWORDS)
+    return _KEYWORD_RE.search(f"{title} {description or ''}") is not None
 
 
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from typing import Optional
+import asyncio
+import logging
+from typing import List, Optional, Sequence, Tuple
 
 import httpx
+import orjson
 
+from .. import aio, llm_cache
 from ..config import get_settings
 
+logger = logging.getLogger(__name__)
+
 PROMPT_TEMPLATE = (
     "你是资深科技编辑。请判断以下内容是否与AI算法/模型/研究密切相关。\n"
     "给出严格的 yes 或 no。\n\n"
@@ -18,62 +24,118 @@ async def _call_chat(prompt: str, timeout: float = 12.0) -> Optional[str]:
     settings = get_settings()
 
     # Ollama-only endpoint
-    base_url = settings.ollama_base_url
-    api_key = None
+    base_url = settings.ollama_base_url.rstrip("/")
 
     # Choose model: explicit setting > infer from base URL
     model_name = settings.llm_model or "qwen2.5:7b"
 
     headers = {"Content-Type": "application/json"}
 
-    payload = {
-        "model": model_name,
-        "messages": [
-            {"role": "system", "content": "只回答 yes 或 no"},
-            {"role": "user", "content": prompt},
-        ],
-        "temperature": 0.1,
-        "max_tokens": 4,
-    }
-
-    url = f"{base_url}/chat/completions"
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            resp = await client.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-            text = (
-                data.get("choices", [{}])[0]
-                .get("message", {})
-                .get("content", "")
-                .strip()
-                .lower()
-            )
-            return text
-        except Exception:
-            return None
+    if base_url.endswith("/v1"):
+        # Ollama's native endpoint: the verdict is the first letter, so a few
+        # tokens are enough (room for a leading space or quote). The server
+        # applies the model's chat template to system + prompt.
+        url = f"{base_url[:-3]}/api/generate"
+        payload = {
+            "model": model_name,
+            "system": "只回答 yes 或 no",
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": 3, "temperature": 0},
+        }
+        parse = _generate_text
+    else:
+        # Other OpenAI-compatible servers
+        url = f"{base_url}/chat/completions"
+        payload = {
+            "model": model_name,
+            "messages": [
+                {"role": "system", "content": "只回答 yes 或 no"},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.1,
+            "max_tokens": 4,
+        }
+        parse = _chat_text
+
+    # Shared pool; callers must be on the aio loop
+    return await _post_chat(aio.get_client(), url, headers, payload, parse, timeout)
+
+
+# Whitespace and quoting a model may put around its yes/no
+_NOISE = " \t\r\n\"'`*.,:;!“”‘’：，。"
+
+
+def _generate_text(data: dict) -> str:
+    return data.get("response", "")
+
+
+def _chat_text(data: dict) -> str:
+    return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+
+
+async def _post_chat(
+    client: httpx.AsyncClient, url: str, headers: dict, payload: dict, parse, timeout: float
+) -> Optional[str]:
+    try:
+        resp = await client.post(url, headers=headers, json=payload, timeout=timeout)
+        resp.raise_for_status()
+        text = parse(orjson.loads(resp.content)).strip(_NOISE).lower()
+    except Exception:
+        return None
+    # No letters to judge by is no verdict: fail open and don't cache it
+    return text or None
 
 
-def is_ai_related_llm_sync(title: str, description: Optional[str]) -> Optional[bool]:
-    """Sync wrapper for DeepSeek relevance classification.
-    Returns True/False if LLM responded; None if unavailable or errored.
-    """
-    import anyio
+async def classify_batch(
+    items: Sequence[Tuple[str, Optional[str]]], concurrency: int = 8, timeout: float = 12.0
+) -> List[Optional[bool]]:
+    """Classify many (title, description) pairs over the shared aio client.
 
-    prompt = PROMPT_TEMPLATE.format(title=title, description=description or "")
+    At most ``concurrency`` requests are in flight so a local Ollama isn't
+    flooded. Results keep the input order; None means the LLM was unavailable.
+    """
+    sem = asyncio.Semaphore(max(1, concurrency))
 
-    async def _inner() -> Optional[bool]:
-        text = await _call_chat(prompt)
+    async def _one(title: str, description: Optional[str]) -> Optional[bool]:
+        prompt = PROMPT_TEMPLATE.format(title=title, description=description or "")
+        async with sem:
+            text = await _call_chat(prompt, timeout=timeout)
         if text is None:
-            print(f"[classify.llm] none title={title[:80]}")
+            logger.debug("none title=%s", title[:80])
             return None
         result = text.startswith("y")
-        print(f"[classify.llm] text={text!r} result={result} title={title[:80]}")
+        logger.debug("text=%r result=%s title=%s", text, result, title[:80])
         return result
 
-    try:
-        return anyio.run(_inner)
-    except Exception:
-        return None
+    return list(await asyncio.gather(*[_one(t, d) for t, d in items]))
 
 
+def is_ai_related_llm_batch_sync(items: Sequence[Tuple[str, Optional[str]]]) -> List[Optional[bool]]:
+    """Sync wrapper around classify_batch, run on the shared aio loop.
+    Cached replies are answered from LlmCache; only the rest hit the LLM.
+    """
+    items = list(items)
+    if not items:
+        return []
+    keys = [llm_cache.cache_key(PROMPT_TEMPLATE.format(title=t, description=d or "")) for t, d in items]
+    cached = llm_cache.get_many(keys)
+    results: List[Optional[bool]] = [None] * len(items)
+    missing = []
+    for i, key in enumerate(keys):
+        text = cached.get(key)
+        if text is None:
+            missing.append(i)
+        else:
+            results[i] = text.startswith("y")
+    if not missing:
+        return results
+    try:
+        verdicts = aio.run(classify_batch, [items[i] for i in missing])
+    except Exception:
+        return results
+    # The reply text is reduced to yes/no before it leaves classify_batch
+    llm_cache.put_many({keys[i]: ("yes" if v else "no") for i, v in zip(missing, verdicts) if v is not None})
+    for i, verdict in zip(missing, verdicts):
+        results[i] = verdict
+    return results
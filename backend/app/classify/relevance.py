@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from .keywords import is_ai_related_keywords
+from .llm import is_ai_related_llm_batch_sync
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SIZE = 4096
+_verdicts: "OrderedDict[bytes, bool]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(title: str, description: Optional[str]) -> bytes:
+    text = f"{title}\x1f{description or ''}"
+    return hashlib.blake2b(text.encode("utf-8", errors="ignore"), digest_size=16).digest()
+
+
+def _recall(key: bytes) -> Optional[bool]:
+    with _lock:
+        verdict = _verdicts.get(key)
+        if verdict is not None:
+            _verdicts.move_to_end(key)
+        return verdict
+
+
+def _remember(key: bytes, verdict: bool) -> None:
+    with _lock:
+        _verdicts[key] = verdict
+        _verdicts.move_to_end(key)
+        if len(_verdicts) > _CACHE_SIZE:
+            _verdicts.popitem(last=False)
+
+
+def filter_relevant(items: Sequence[Tuple[str, Optional[str]]]) -> List[bool]:
+    """Keyword hit → relevant without touching the LLM; the uncached misses go to
+    the LLM in one batch and their verdicts are memoized.
+
+    Fail-open: an item the LLM could not judge is kept, and the miss is not
+    memoized so the next run asks again.
+    """
+    results: List[bool] = [True] * len(items)
+    llm_hits: List[Optional[bool]] = [None] * len(items)
+    keyword_hits = [is_ai_related_keywords(title, description) for title, description in items]
+    pending = []
+    for i, (title, description) in enumerate(items):
+        if keyword_hits[i]:
+            continue
+        key = _key(title, description)
+        cached = _recall(key)
+        if cached is not None:
+            results[i] = llm_hits[i] = cached
+            continue
+        pending.append((i, key))
+
+    verdicts = is_ai_related_llm_batch_sync([items[i] for i, _ in pending])
+    for (i, key), verdict in zip(pending, verdicts):
+        llm_hits[i] = verdict
+        if verdict is not None:
+            _remember(key, verdict)
+            results[i] = verdict
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for (title, _), keyword_hit, llm_hit, relevant in zip(items, keyword_hits, llm_hits, results):
+            logger.debug("kw=%s llm=%s relevant=%s title=%s", keyword_hit, llm_hit, relevant, title[:80])
+    return results
@@ -10,6 +10,8 @@ load_dotenv()
 class Settings(BaseSettings):
     app_name: str = "AI Algorithm News Agent"
     environment: str = "development"
+    # Level for the app's logging (per-item LLM/filter traces are DEBUG)
+    log_level: str = "WARNING"
 
     database_url: str = "sqlite:///./news.db"
 
@@ -28,6 +30,12 @@ class Settings(BaseSettings):
     hn_query_terms: Optional[str] = None
     hn_min_points: int = 10
 
+    # RSS fetch settings: max parallel feed connections
+    rss_concurrency: int = 8
+
+    # Summarization: LLM requests in flight per scheduled batch
+    summarize_batch_size: int = 8
+
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", case_sensitive=False)
 
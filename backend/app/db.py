@@ -1,6 +1,9 @@
 from contextlib import contextmanager
-from typing import Iterator
+from typing import Iterator, Optional
+from urllib.parse import urlsplit
 
+from sqlalchemy import column, event, inspect, text
+from sqlalchemy.schema import CreateIndex
 from sqlmodel import Session, SQLModel, create_engine
 
 from .config import get_settings
@@ -8,6 +11,24 @@ from .config import get_settings
 
 _engine = None
 
+# Per-connection settings. journal_mode=WAL is persistent in the database file,
+# so it is set once in create_db_and_tables instead of on every connect.
+_SQLITE_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 def get_engine():
     global _engine
@@ -17,12 +38,155 @@ def get_engine():
         if settings.database_url.startswith("sqlite"):
             connect_args = {"check_same_thread": False}
         _engine = create_engine(settings.database_url, connect_args=connect_args)
+        if settings.database_url.startswith("sqlite"):
+            event.listen(_engine, "connect", _set_sqlite_pragmas)
     return _engine
 
 
+# Tables whose titles are mirrored into an FTS5 trigram index (SQLite only)
+_FTS_TABLES = ("article", "paper", "news")
+_fts_ready: set = set()
+
+
+def _create_fts(engine) -> None:
+    """External-content FTS5 trigram tables kept in sync by triggers.
+
+    A trigram index serves ``LIKE '%q%'`` for patterns of 3+ characters, so
+    title search no longer scans the whole table. Needs SQLite >= 3.34; older
+    builds keep the plain LIKE scan.
+    """
+    for table in _FTS_TABLES:
+        fts = f"{table}_fts"
+        try:
+            with engine.begin() as conn:
+                exists = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)
+                ).first()
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                    f"title, content='{table}', content_rowid='id', tokenize='trigram')"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, title) VALUES ('delete', old.id, old.title); END"
+                )
+                conn.exec_driver_sql(
+                    f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF title ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, title) VALUES ('delete', old.id, old.title); "
+                    f"INSERT INTO {fts}(rowid, title) VALUES (new.id, new.title); END"
+                )
+                if not exists:
+                    # Index rows that predate the mirror
+                    conn.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            _fts_ready.add(table)
+        except Exception as e:
+            print(f"fts setup skipped for {table}: {e}")
+
+
+def _create_trgm(engine) -> None:
+    """Postgres: GIN trigram indexes let ILIKE '%q%' on titles use an index."""
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for table in _FTS_TABLES:
+                conn.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS ix_{table}_title_trgm ON {table} USING gin (title gin_trgm_ops)"
+                )
+    except Exception as e:
+        print(f"trigram index setup skipped: {e}")
+
+
+def url_host(url: Optional[str]) -> Optional[str]:
+    """Lowercased host of ``url`` without a leading "www.", or None."""
+    try:
+        host = urlsplit(url or "").hostname
+    except ValueError:
+        return None
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def host_matches(column, domain: str):
+    """WHERE clause: host equals ``domain``, normalized like url_host.
+
+    Exact match only, so the url_host index serves it; a leading-wildcard
+    LIKE for subdomains would scan the table.
+    """
+    domain = url_host(domain if "://" in domain else f"//{domain.strip()}") or domain.strip().lower()
+    return column == domain
+
+
+# Tables that gained url_host after release: add the column and backfill it
+_URL_HOST_TABLES = ("article", "news")
+
+
+def _add_url_host(engine) -> None:
+    insp = inspect(engine)
+    for table in _URL_HOST_TABLES:
+        if "url_host" in {c["name"] for c in insp.get_columns(table)}:
+            continue
+        with engine.begin() as conn:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN url_host VARCHAR")
+            rows = conn.exec_driver_sql(f"SELECT id, url FROM {table}").all()
+            if rows:
+                conn.execute(
+                    text(f"UPDATE {table} SET url_host = :host WHERE id = :id"),
+                    [{"id": row_id, "host": url_host(url)} for row_id, url in rows],
+                )
+        print(f"added url_host to {table} ({len(rows)} rows backfilled)")
+
+
+def _reset_feed_state(engine) -> None:
+    # feedstate was first keyed by url alone, then gained cutoff; it only caches
+    # validators, so an old-layout table is dropped and recreated by create_all
+    insp = inspect(engine)
+    if not insp.has_table("feedstate"):
+        return
+    if not {"consumer", "cutoff"} <= {c["name"] for c in insp.get_columns("feedstate")}:
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE feedstate")
+        print("recreated feedstate keyed by (consumer, url)")
+
+
 def create_db_and_tables() -> None:
     engine = get_engine()
+    if engine.dialect.name == "sqlite":
+        # WAL turns each commit into an append instead of a rollback-journal
+        # fsync, and lets API readers run while ingest writes.
+        with engine.connect() as conn:
+            conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    _reset_feed_state(engine)
     SQLModel.metadata.create_all(engine)
+    _add_url_host(engine)
+    # create_all skips indexes of tables that already exist; add new ones.
+    # IF NOT EXISTS instead of checkfirst: reflection can't see expression indexes
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
+    if engine.dialect.name == "sqlite":
+        _create_fts(engine)
+    elif engine.dialect.name == "postgresql":
+        _create_trgm(engine)
+
+
+def title_contains(model, q: str):
+    """WHERE clause for a case-insensitive substring match on ``model.title``.
+
+    Goes through the FTS5 trigram mirror when it exists and ``q`` is long
+    enough for trigrams; otherwise a plain ILIKE.
+    """
+    like = f"%{q}%"
+    table = model.__tablename__
+    if table in _fts_ready and len(q) >= 3:
+        rowids = text(f"SELECT rowid FROM {table}_fts WHERE title LIKE :like").bindparams(like=like)
+        return model.id.in_(rowids.columns(column("rowid")))
+    return model.title.ilike(like)
 
 
 def get_session() -> Iterator[Session]:
@@ -1,22 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
-import hashlib
-from typing import Iterable, List, Optional, Set
+from typing import Dict, Iterable, List, Optional
 
 import httpx
-from sqlmodel import select
+import orjson
 
+from .. import aio
 from ..db import session_context
 from ..models import News
+from .upsert import compute_hash, upsert_entries
 from ..config import get_settings
-from ..classify.keywords import is_ai_related_keywords
-from ..classify.llm import is_ai_related_llm_sync
-
-
-def _compute_hash(title: str, url: str, description: Optional[str]) -> str:
-    text = "||".join([title or "", url or "", (description or "")[:1000]])
-    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+from ..classify.relevance import filter_relevant
 
 
 def _to_dt(created_at: Optional[str], created_at_i: Optional[int]) -> Optional[datetime]:
@@ -50,6 +46,38 @@ DEFAULT_TERMS: List[str] = [
 ]
 
 
+_ALGOLIA_URL = "https://hn.algolia.com/api/v1"
+_HEADERS = {"User-Agent": "ai-news-agent/1.0"}
+
+
+async def _get_hits(client: httpx.AsyncClient, path: str, params: dict, label: str) -> list:
+    try:
+        r = await client.get(f"{_ALGOLIA_URL}/{path}", params=params, headers=_HEADERS)
+        r.raise_for_status()
+        return orjson.loads(r.content).get("hits", [])
+    except Exception as e:
+        print(f"[ingest.hn] fetch error for {label}: {e}")
+        return []
+
+
+async def _fetch_all_hits(terms: List[str]) -> List[list]:
+    """Run every term search plus the front page at once; one hit list per query."""
+    client = aio.get_client()
+    # Use search_by_date to get latest items; restrict to stories
+    queries = [
+        _get_hits(
+            client,
+            "search_by_date",
+            {"query": term, "tags": "story", "hitsPerPage": 50, "page": 0},
+            f"term '{term}'",
+        )
+        for term in terms
+    ]
+    # Also fetch front page (hot)
+    queries.append(_get_hits(client, "search", {"tags": "front_page", "hitsPerPage": 50, "page": 0}, "front_page"))
+    return list(await asyncio.gather(*queries))
+
+
 def fetch_hn(
     query_terms: Optional[Iterable[str]] = None,
     max_age_days: Optional[int] = None,
@@ -67,124 +95,54 @@ def fetch_hn(
 
     max_age_days = max_age_days if max_age_days is not None else settings.max_age_days_default
     cutoff = datetime.utcnow() - timedelta(days=max_age_days) if max_age_days and max_age_days > 0 else None
-    min_points = min_points if min_points is not None else getattr(settings, "hn_min_points", 10)
+    # Resolved once; the hit loop below only reads locals
+    min_points = int(min_points if min_points is not None else getattr(settings, "hn_min_points", 10))
+    enable_llm_filter = settings.enable_llm_filter
 
     new_or_updated: List[News] = []
-    seen_urls: Set[str] = set()
-
-    def add_story(session, title: str, url: Optional[str], created_at: Optional[datetime]):
-        nonlocal new_or_updated
-        if not url:
-            return
-        if url in seen_urls:
-            return
-        seen_urls.add(url)
-        existing = session.exec(select(News).where(News.url == url)).first()
-        content_hash = _compute_hash(title, url, None)
-        if existing:
-            changed = False
-            if (created_at and existing.published_at is None) or (
-                created_at and existing.published_at and existing.published_at != created_at
-            ):
-                existing.published_at = created_at
-                changed = True
-            if content_hash and content_hash != (existing.content_hash or ""):
-                existing.content_hash = content_hash
-                changed = True
-            if changed:
-                existing.updated_at = datetime.utcnow()
-                session.add(existing)
-                session.commit()
-                session.refresh(existing)
-                new_or_updated.append(existing)
-            return
-
-        article = News(
-            title=title or "",
-            url=url,
-            source="Hacker News",
-            published_at=created_at,
-            description=None,
-            content_hash=content_hash,
-        )
-        session.add(article)
-        try:
-            session.commit()
-        except Exception:
-            session.rollback()
-            return
-        session.refresh(article)
-        new_or_updated.append(article)
-
-    with session_context() as session:
-        with httpx.Client(timeout=10.0, headers={"User-Agent": "ai-news-agent/1.0"}) as client:
-            for term in terms:
-                try:
-                    # Use search_by_date to get latest items; restrict to stories
-                    params = {
-                        "query": term,
-                        "tags": "story",
-                        "hitsPerPage": 50,
-                        "page": 0,
-                    }
-                    r = client.get("https://hn.algolia.com/api/v1/search_by_date", params=params)
-                    r.raise_for_status()
-                    data = r.json()
-                    for hit in data.get("hits", []):
-                        title = hit.get("title") or hit.get("story_title") or ""
-                        url = hit.get("url") or hit.get("story_url")
-                        # Fallback to HN item link if no external URL (e.g., Ask HN)
-                        if not url and hit.get("objectID"):
-                            url = f"https://news.ycombinator.com/item?id={hit.get('objectID')}"
-                        created_at = _to_dt(hit.get("created_at"), hit.get("created_at_i"))
-                        if cutoff and (not created_at or created_at < cutoff):
-                            continue
-                        points = hit.get("points")
-                        if isinstance(points, int) and points < int(min_points):
-                            continue
-                        # Unified relevance filtering (same as rss_fetcher)
-                        if settings.enable_llm_filter:
-                            keyword_hit = is_ai_related_keywords(title, None)
-                            llm_hit = is_ai_related_llm_sync(title, None) if not keyword_hit else True
-                            relevant = bool(keyword_hit or (True if llm_hit is None else llm_hit))
-                            print(f"[ingest.filter] kw={keyword_hit} llm={llm_hit} relevant={relevant} title={title[:80]}")
-                            if not relevant:
-                                continue
-                        add_story(session, title, url, created_at)
-                except Exception as e:
-                    print(f"[ingest.hn] fetch error for term '{term}': {e}")
-
-            # Also fetch front page (hot)
+    # Keyed by url: the first hit for a url wins, later duplicates are dropped
+    rows: Dict[str, dict] = {}
+
+    # All Algolia queries run concurrently; hits are merged in query order
+    for hits in aio.run(_fetch_all_hits, terms):
+        for hit in hits:
+            title = hit.get("title") or hit.get("story_title") or ""
+            url = hit.get("url") or hit.get("story_url")
+            # Fallback to HN item link if no external URL (e.g., Ask HN)
+            if not url and hit.get("objectID"):
+                url = f"https://news.ycombinator.com/item?id={hit.get('objectID')}"
+            created_at = _to_dt(hit.get("created_at"), hit.get("created_at_i"))
+            if cutoff and (not created_at or created_at < cutoff):
+                continue
+            points = hit.get("points")
+            if isinstance(points, int) and points < min_points:
+                continue
+            if not url or url in rows:
+                continue
+            rows[url] = dict(
+                title=title,
+                url=url,
+                source="Hacker News",
+                published_at=created_at,
+                description=None,
+                content_hash=compute_hash(title, url, None),
+            )
+
+    # Unified relevance filtering (same as rss_fetcher)
+    batch = list(rows.values())
+    if enable_llm_filter:
+        relevant = filter_relevant([(row["title"], None) for row in batch])
+        batch = [row for row, keep in zip(batch, relevant) if keep]
+
+    # One lookup + one upsert statement + one commit for the whole run
+    if batch:
+        with session_context() as session:
             try:
-                params = {
-                    "tags": "front_page",
-                    "hitsPerPage": 50,
-                    "page": 0,
-                }
-                r = client.get("https://hn.algolia.com/api/v1/search", params=params)
-                r.raise_for_status()
-                data = r.json()
-                for hit in data.get("hits", []):
-                    title = hit.get("title") or hit.get("story_title") or ""
-                    url = hit.get("url") or hit.get("story_url")
-                    if not url and hit.get("objectID"):
-                        url = f"https://news.ycombinator.com/item?id={hit.get('objectID')}"
-                    created_at = _to_dt(hit.get("created_at"), hit.get("created_at_i"))
-                    if cutoff and (not created_at or created_at < cutoff):
-                        continue
-                    points = hit.get("points")
-                    if isinstance(points, int) and points < int(min_points):
-                        continue
-                    if settings.enable_llm_filter:
-                        keyword_hit = is_ai_related_keywords(title, None)
-                        llm_hit = is_ai_related_llm_sync(title, None) if not keyword_hit else True
-                        relevant = bool(keyword_hit or (True if llm_hit is None else llm_hit))
-                        print(f"[ingest.filter] kw={keyword_hit} llm={llm_hit} relevant={relevant} title={title[:80]}")
-                        if not relevant:
-                            continue
-                    add_story(session, title, url, created_at)
+                new_or_updated.extend(upsert_entries(session, News, batch))
+                session.commit()
             except Exception as e:
-                print(f"[ingest.hn] fetch error for front_page: {e}")
+                session.rollback()
+                print(f"[ingest.hn] upsert error: {e}")
 
     return new_or_updated
 
@@ -18,5 +18,5 @@ NEWS_FEEDS = [
     "https://raw.githubusercontent.com/Olshansk/rss-feeds/refs/heads/main/feeds/feed_anthropic.xml",
 ]
 
-# Back-compat
-DEFAULT_RSS_SOURCES = ARXIV_FEEDS + NEWS_FEEDS
+# Back-compat; a tuple so callers can use it without copying
+DEFAULT_RSS_SOURCES = tuple(ARXIV_FEEDS + NEWS_FEEDS)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, select
+
+from ..db import url_host
+
+
+# Change detection only; blake2b is faster than sha1 and keeps the 40-char digest.
+# Each entry copies the pre-built hasher and feeds the fields in place.
+_HASH_SEED = hashlib.blake2b(digest_size=20)
+_HASH_SEP = b"||"
+
+
+def compute_hash(title: str, url: str, description: Optional[str]) -> str:
+    """content_hash of an entry, shared by every fetcher."""
+    h = _HASH_SEED.copy()
+    h.update((title or "").encode("utf-8", errors="ignore"))
+    h.update(_HASH_SEP)
+    h.update((url or "").encode("utf-8", errors="ignore"))
+    h.update(_HASH_SEP)
+    if description:
+        h.update(description[:1000].encode("utf-8", errors="ignore"))
+    return h.hexdigest()
+
+
+def _insert_for(session: Session):
+    if session.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+Known = Dict[str, Tuple[Optional[str], Optional[datetime]]]
+
+
+def known_entries(session: Session, model, urls: Iterable[str]) -> Known:
+    """Stored (content_hash, published_at) for each of ``urls`` that already exists, in one query."""
+    urls = list(urls)
+    if not urls:
+        return {}
+    stmt = select(model.url, model.content_hash, model.published_at).where(model.url.in_(urls))
+    return {url: (content_hash, published_at) for url, content_hash, published_at in session.exec(stmt)}
+
+
+def is_unchanged(known: Known, url: str, content_hash: str, published_at: Optional[datetime]) -> bool:
+    """True if ``url`` is stored with this hash and the feed brings no new date.
+
+    content_hash covers title/url/description only, so a corrected or newly
+    added published_at is checked separately; a missing one keeps the stored date.
+    """
+    stored = known.get(url)
+    if stored is None or (stored[0] or "") != content_hash:
+        return False
+    return published_at is None or published_at == stored[1]
+
+
+def upsert_entries(session: Session, model, rows: Sequence[dict], known: Optional[Known] = None) -> list:
+    """Insert new entries and refresh changed ones with one lookup and one statement.
+
+    ``rows`` are dicts with title/url/source/published_at/description/content_hash;
+    duplicate urls keep the last row. An existing row is rewritten only when
+    its hash or published_at changed (see is_unchanged); stored
+    description/published_at survive if the feed dropped them.
+    ``known`` is a known_entries() result the caller already has; without it
+    the lookup is done here. Returns the inserted/updated instances. The caller
+    commits.
+    """
+    by_url: Dict[str, dict] = {row["url"]: row for row in rows}
+    if not by_url:
+        return []
+
+    if known is None:
+        known = known_entries(session, model, by_url)
+
+    now = datetime.utcnow()
+    pending: List[dict] = [
+        {**row, "created_at": now, "updated_at": now}
+        for url, row in by_url.items()
+        if not is_unchanged(known, url, row["content_hash"], row["published_at"])
+    ]
+    if hasattr(model, "url_host"):
+        for row in pending:
+            row["url_host"] = url_host(row["url"])
+    if not pending:
+        return []
+
+    stmt = _insert_for(session)(model).values(pending)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={
+            # Keep stored values the feed no longer provides
+            "description": func.coalesce(func.nullif(excluded.description, ""), model.description),
+            "published_at": func.coalesce(excluded.published_at, model.published_at),
+            "content_hash": excluded.content_hash,
+            "updated_at": excluded.updated_at,
+        },
+    )
+    return list(session.scalars(stmt.returning(model), execution_options={"populate_existing": True}))
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import hashlib
+from typing import Dict, Sequence
+
+from sqlmodel import delete, select
+
+from .config import get_settings
+from .db import session_context
+from .models import LlmCache
+
+
+# Replies for the same model + prompt are reused for this long
+CACHE_TTL = timedelta(days=30)
+
+
+def cache_key(prompt: str) -> str:
+    model_name = get_settings().llm_model or "qwen2.5:7b"
+    data = f"{model_name}\0{prompt}".encode("utf-8", errors="ignore")
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def get_many(keys: Sequence[str]) -> Dict[str, str]:
+    if not keys:
+        return {}
+    try:
+        cutoff = datetime.utcnow() - CACHE_TTL
+        with session_context() as session:
+            rows = session.exec(
+                select(LlmCache.key, LlmCache.response).where(
+                    LlmCache.key.in_(list(keys)), LlmCache.created_at >= cutoff
+                )
+            )
+            return {key: response for key, response in rows}
+    except Exception as e:
+        print(f"[llm_cache] read error: {e}")
+        return {}
+
+
+def put_many(responses: Dict[str, str]) -> None:
+    if not responses:
+        return
+    try:
+        with session_context() as session:
+            # Drop expired copies first so the inserts don't collide
+            session.exec(delete(LlmCache).where(LlmCache.key.in_(list(responses))))
+            session.add_all(LlmCache(key=key, response=text) for key, text in responses.items())
+            session.commit()
+    except Exception as e:
+        print(f"[llm_cache] write error: {e}")
@@ -1,6 +1,9 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from . import aio
 from .config import get_settings
 from .db import create_db_and_tables
 from .routers.health import router as health_router
@@ -13,6 +16,7 @@ from pathlib import Path
 
 def create_app() -> FastAPI:
     settings = get_settings()
+    logging.basicConfig(level=settings.log_level.upper(), format="[%(name)s] %(levelname)s %(message)s")
     app = FastAPI(title=settings.app_name, version="0.1.0")
 
     app.add_middleware(
@@ -40,6 +44,11 @@ def create_app() -> FastAPI:
         scheduler = create_scheduler()
         scheduler.start()
 
+    @app.on_event("shutdown")
+    def on_shutdown() -> None:
+        # Close the warm HTTP client and its event loop
+        aio.shutdown()
+
     return app
 
 
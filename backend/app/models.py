@@ -1,14 +1,19 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index, desc
 from sqlmodel import Field, SQLModel
 
 
 class Article(SQLModel, table=True):
+    __table_args__ = (Index("ix_article_source_published_at", "source", desc("published_at")),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
     url: str = Field(index=True, unique=True)
+    # Lowercased host without "www.", filled at ingest for the domain filter
+    url_host: Optional[str] = Field(default=None, index=True)
     source: str = Field(index=True)
 
     published_at: Optional[datetime] = Field(default=None, index=True)
@@ -21,8 +26,9 @@ class Article(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
 
-
 class Paper(SQLModel, table=True):
+    __table_args__ = (Index("ix_paper_source_published_at", "source", desc("published_at")),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
@@ -40,10 +46,14 @@ class Paper(SQLModel, table=True):
 
 
 class News(SQLModel, table=True):
+    __table_args__ = (Index("ix_news_source_published_at", "source", desc("published_at")),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     title: str
     url: str = Field(index=True, unique=True)
+    # Lowercased host without "www.", filled at ingest for the domain filter
+    url_host: Optional[str] = Field(default=None, index=True)
     source: str = Field(index=True)
 
     published_at: Optional[datetime] = Field(default=None, index=True)
@@ -55,3 +65,45 @@ class News(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+
+
+def _pending_summary_index(model) -> Index:
+    """Partial index over unsummarized rows, in the summarize queue's order."""
+    return Index(
+        f"ix_{model.__tablename__}_pending_order",
+        model.published_at.is_(None),
+        model.published_at.desc(),
+        model.created_at.desc(),
+        sqlite_where=model.summary.is_(None),
+        postgresql_where=model.summary.is_(None),
+    )
+
+
+for _model in (Article, Paper, News):
+    _pending_summary_index(_model)
+
+
+class LlmCache(SQLModel, table=True):
+    """Raw LLM replies keyed by a hash of model + prompt."""
+
+    key: str = Field(primary_key=True)
+    response: str
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class FeedState(SQLModel, table=True):
+    """HTTP validators from the last fetch of a feed, for conditional GETs.
+
+    Keyed per consumer (the table the feed is ingested into): the same URL can
+    feed several pipelines, and a 304 for one must not hide entries another
+    hasn't stored yet. ``cutoff`` is the oldest publish date the last full read
+    kept (None: no age limit); a run asking for older entries than that skips
+    the validators, since a 304 would hide entries it never stored.
+    """
+
+    consumer: str = Field(primary_key=True)
+    url: str = Field(primary_key=True)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    cutoff: Optional[datetime] = None
+    last_fetched: datetime = Field(default_factory=datetime.utcnow)
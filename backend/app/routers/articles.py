@@ -5,14 +5,15 @@ from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
-from ..db import get_session
+from ..db import get_session, host_matches, title_contains
 from ..models import Article
-from ..schemas import ArticleOut
+from ..schemas import ArticleOut, out_columns, rows_response
 from ..config import get_settings
 from ..ingest.rss_fetcher import fetch_rss_sources
 from ..ingest.hn_fetcher import fetch_hn
 from fastapi import BackgroundTasks
-from ..scheduler import _summarize_pending, summarize_stream, summarize_stream_async
+from .sse import relay
+from ..scheduler import _summarize_pending, summarize_stream
 
 
 router = APIRouter()
@@ -24,21 +25,19 @@ def list_articles(
     offset: int = Query(0, ge=0),
     source: Optional[str] = Query(None),
     q: Optional[str] = Query(None),
-    domain: Optional[str] = Query(None, description="按URL域名模糊过滤，如 arxiv.org"),
+    domain: Optional[str] = Query(None, description="按URL域名精确过滤（不含子域名），如 arxiv.org"),
     session=Depends(get_session),
 ):
-    stmt = select(Article).order_by(Article.published_at.desc())
+    stmt = select(*out_columns(Article, ArticleOut)).order_by(Article.published_at.desc())
     if source:
         stmt = stmt.where(Article.source == source)
     if q:
-        like = f"%{q}%"
-        stmt = stmt.where(Article.title.ilike(like))
+        stmt = stmt.where(title_contains(Article, q))
     if domain:
-        like_d = f"%{domain}%"
-        stmt = stmt.where(Article.url.ilike(like_d))
+        stmt = stmt.where(host_matches(Article.url_host, domain))
     stmt = stmt.limit(limit).offset(offset)
-    items = session.exec(stmt).all()
-    return items
+    items = session.execute(stmt).mappings().all()
+    return rows_response(items)
 
 
 @router.get("/articles/sources", response_model=List[str])
@@ -100,13 +99,13 @@ def manual_refresh_stream(
                 yield f"data: hn fetch error: {e}\n\n"
         yield "data: summarizing...\n\n"
         i = 0
-        # Use sync summarizer to avoid event-loop blocking interactions
+        # LLM calls run concurrently (bounded) on the aio loop; DB work stays on relay's worker thread
         for _id, title in summarize_stream(limit=summarize_limit, concurrency=summarize_concurrency):
             i += 1
             yield f"data: summarized #{i}: {title[:80]}\n\n"
         yield f"data: summarized total {i}\n\n"
         yield "data: done\n\n"
 
-    return StreamingResponse(gen(), media_type="text/event-stream")
+    return StreamingResponse(relay(gen()), media_type="text/event-stream")
 
 
@@ -4,12 +4,13 @@ from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
-from ..db import get_session
+from ..db import get_session, host_matches, title_contains
 from ..models import News
-from ..schemas import NewsOut
+from ..schemas import NewsOut, out_columns, rows_response
 from ..config import get_settings
 from ..ingest.news_fetcher import fetch_news
 from ..ingest.hn_fetcher import fetch_hn
+from .sse import relay
 from ..scheduler import summarize_news_stream
 
 
@@ -26,20 +27,18 @@ def list_news(
     only_summarized: bool = Query(False, description="仅返回已有摘要的条目"),
     session=Depends(get_session),
 ):
-    stmt = select(News).order_by(News.published_at.desc())
+    stmt = select(*out_columns(News, NewsOut)).order_by(News.published_at.desc())
     if source:
         stmt = stmt.where(News.source == source)
     if q:
-        like = f"%{q}%"
-        stmt = stmt.where(News.title.ilike(like))
+        stmt = stmt.where(title_contains(News, q))
     if domain:
-        like_d = f"%{domain}%"
-        stmt = stmt.where(News.url.ilike(like_d))
+        stmt = stmt.where(host_matches(News.url_host, domain))
     if only_summarized:
         stmt = stmt.where(News.summary != None)  # noqa: E711
     stmt = stmt.limit(limit).offset(offset)
-    items = session.exec(stmt).all()
-    return items
+    items = session.execute(stmt).mappings().all()
+    return rows_response(items)
 
 
 @router.get("/news/sources", response_model=List[str])
@@ -92,6 +91,6 @@ def refresh_news_stream(
         yield f"data: summarized total {i}\n\n"
         yield "data: done\n\n"
 
-    return StreamingResponse(gen(), media_type="text/event-stream")
+    return StreamingResponse(relay(gen()), media_type="text/event-stream")
 
 
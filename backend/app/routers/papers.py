@@ -4,11 +4,12 @@ from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlmodel import select
 
-from ..db import get_session
+from ..db import get_session, title_contains
 from ..models import Paper
-from ..schemas import PaperOut
+from ..schemas import PaperOut, out_columns, rows_response
 from ..config import get_settings
 from ..ingest.arxiv_fetcher import fetch_arxiv, fetch_arxiv_stream
+from .sse import relay
 from ..scheduler import summarize_papers_stream
 
 
@@ -22,13 +23,12 @@ def list_papers(
     q: Optional[str] = Query(None),
     session=Depends(get_session),
 ):
-    stmt = select(Paper).order_by(Paper.published_at.desc())
+    stmt = select(*out_columns(Paper, PaperOut)).order_by(Paper.published_at.desc())
     if q:
-        like = f"%{q}%"
-        stmt = stmt.where(Paper.title.ilike(like))
+        stmt = stmt.where(title_contains(Paper, q))
     stmt = stmt.limit(limit).offset(offset)
-    items = session.exec(stmt).all()
-    return items
+    items = session.execute(stmt).mappings().all()
+    return rows_response(items)
 
 
 @router.get("/papers/refresh/stream")
@@ -70,6 +70,6 @@ def refresh_papers_stream(
         yield f"data: summarized total {i}\n\n"
         yield "data: done\n\n"
 
-    return StreamingResponse(gen(), media_type="text/event-stream")
+    return StreamingResponse(relay(gen()), media_type="text/event-stream")
 
 
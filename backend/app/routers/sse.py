@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import AsyncIterator, Iterator
+
+
+async def relay(gen: Iterator[str]) -> AsyncIterator[str]:
+    """Stream a blocking SSE generator from a single worker thread.
+
+    StreamingResponse resumes a sync generator through a fresh threadpool hop
+    per item, so one refresh hops threads dozens of times while holding a DB
+    session. Here the generator runs start to finish on one worker thread and
+    hands each message to the event loop through an asyncio.Queue. If the
+    client disconnects, the worker stops at its next message.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+    stop = threading.Event()
+
+    def _put(item) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed
+            stop.set()
+
+    def _produce() -> None:
+        try:
+            for item in gen:
+                if stop.is_set():
+                    break
+                _put(item)
+        except Exception as e:
+            _put(f"data: error: {e}\n\n")
+        finally:
+            # done must be queued even if the generator's cleanup fails, or the
+            # consumer below waits forever
+            try:
+                close = getattr(gen, "close", None)
+                if close is not None:
+                    close()
+            except Exception as e:
+                print(f"sse generator cleanup error: {e}")
+            finally:
+                _put(done)
+
+    loop.run_in_executor(None, _produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            yield item
+    finally:
+        stop.set()
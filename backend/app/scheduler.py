@@ -1,40 +1,82 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlmodel import select
+from sqlmodel import select, update
 
+from . import aio, llm_cache
 from .db import session_context
 from .ingest.rss_fetcher import fetch_rss_sources
 from .ingest.hn_fetcher import fetch_hn
 from .models import Article, Paper, News
 import asyncio
-from .summarize.llm import summarize_with_llm_sync, summarize_with_llm_async
+import queue
+import time
+from .summarize.llm import summarize_with_llm_async, summarize_with_llm_batch_sync, summary_cache_key
 from .summarize.extractive import summarize_extractive
 from .config import get_settings
 
 
+# How long a closed stream waits for its cancelled LLM calls to stop
+STREAM_CANCEL_TIMEOUT = 5.0
+
+# _summarize_pending writes summaries with one UPDATE + commit per this many
+# rows; streams commit whatever has finished before reporting it
+SUMMARY_COMMIT_EVERY = 50
+
+
+def _pending(model, limit: int):
+    """Unsummarized rows, newest first (NULL dates last); served by the
+    ix_<table>_pending_order partial index."""
+    return (
+        select(model)
+        .where(model.summary == None)  # noqa: E711
+        .order_by(model.published_at.is_(None), model.published_at.desc(), model.created_at.desc())
+        .limit(limit)
+    )
+
+
+def _flush_summaries(session, model, updates: List[Tuple[int, str]]) -> List[int]:
+    """Write collected (id, summary) pairs as one executemany UPDATE and one commit.
+
+    Empties ``updates``. Returns the ids that were not saved (their batch is
+    rolled back) so streams can report them.
+    """
+    if not updates:
+        return []
+    batch = list(updates)
+    updates.clear()
+    try:
+        session.execute(update(model), [{"id": i, "summary": text} for i, text in batch])
+        session.commit()
+        return []
+    except Exception as e:
+        session.rollback()
+        print(f"[summarize] save error for {model.__tablename__}: {e}")
+        return [i for i, _ in batch]
+
+
 def _summarize_pending(limit: int = 30) -> int:
     """Summarize articles without summary. Returns number processed."""
     count = 0
     with session_context() as session:
-        articles = session.exec(
-            select(Article)
-            .where(Article.summary == None)  # noqa: E711
-            .order_by(Article.published_at.is_(None))  # NULLs last
-            .order_by(Article.published_at.desc())
-            .order_by(Article.created_at.desc())
-        ).all()
-        for art in articles[:limit]:
-            text = summarize_with_llm_sync(art.title, art.description)
+        to_process = session.exec(_pending(Article, limit)).all()
+        # All LLM calls for the run go out together (bounded), then commit in order
+        texts = summarize_with_llm_batch_sync(
+            [(art.title, art.description) for art in to_process],
+            batch_size=get_settings().summarize_batch_size,
+        )
+        updates: List[Tuple[int, str]] = []
+        for art, text in zip(to_process, texts):
             if not text:
                 text = summarize_extractive(art.title, art.description)
             if text:
-                art.summary = text
-                session.add(art)
-                session.commit()
+                updates.append((art.id, text))
                 count += 1
+            if len(updates) >= SUMMARY_COMMIT_EVERY:
+                count -= len(_flush_summaries(session, Article, updates))
+        count -= len(_flush_summaries(session, Article, updates))
     return count
 
 
@@ -55,213 +97,150 @@ def create_scheduler() -> AsyncIOScheduler:
     return scheduler
 
 
-def summarize_stream(limit: int = 30, concurrency: int = 1):
-    """Generator that summarizes pending articles and yields (id, title).
+def _cached_summaries(rows) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """LlmCache keys by row id, and the summaries already cached, in one read."""
+    keys = {row.id: summary_cache_key(row.title, row.description) for row in rows}
+    hits = llm_cache.get_many(list(keys.values()))
+    return keys, {i: hits[key] for i, key in keys.items() if key in hits}
 
-    If concurrency > 1, model calls are executed concurrently (I/O-bound),
-    and DB commits happen sequentially in the current thread.
-    """
-    with session_context() as session:
-        articles = session.exec(
-            select(Article)
-            .where(Article.summary == None)  # noqa: E711
-            .order_by(Article.published_at.is_(None))
-            .order_by(Article.published_at.desc())
-            .order_by(Article.created_at.desc())
-        ).all()
-        to_process = articles[:limit]
-        processed = 0
-
-        if concurrency <= 1:
-            for art in to_process:
-                try:
-                    text = summarize_with_llm_sync(art.title, art.description)
-                    if not text:
-                        text = summarize_extractive(art.title, art.description)
-                    if text:
-                        art.summary = text
-                        session.add(art)
-                        session.commit()
-                        processed += 1
-                        yield art.id, art.title or ""
-                except Exception as e:
-                    session.rollback()
-                    yield art.id, f"error: {str(e)[:60]}"
-            return
 
-        async def _run_batch():
-            sem = asyncio.Semaphore(max(1, int(concurrency)))
+def _cache_summaries(keys: Dict[int, str], fresh: Dict[int, str]) -> None:
+    """Store new LLM summaries (by row id) in one LlmCache write."""
+    llm_cache.put_many({keys[i]: text for i, text in list(fresh.items())})
 
-            async def _job(art: Article):
-                async with sem:
-                    try:
-                        text = await summarize_with_llm_async(art.title, art.description)
-                        return art, text, None
-                    except Exception as exc:
-                        return art, None, exc
 
-            tasks = [_job(art) for art in to_process]
-            return await asyncio.gather(*tasks, return_exceptions=False)
+async def _summarize_one(row, cached: Dict[int, str], fresh: Dict[int, str]):
+    """Cached or LLM summary with extractive fallback for one row: (row, text, error).
 
-        try:
-            results = asyncio.run(_run_batch())
-        except Exception as e:
-            # Fallback to sequential if event loop issues
-            results = []
-            for art in to_process:
-                results.append((art, None, e))
-
-        for art, text, err in results:
-            try:
-                if err is not None:
-                    text = None
-                if not text:
-                    text = summarize_extractive(art.title, art.description)
-                if text:
-                    art.summary = text
-                    session.add(art)
-                    session.commit()
-                    processed += 1
-                    yield art.id, art.title or ""
-            except Exception as e:
-                session.rollback()
-                yield art.id, f"error: {str(e)[:60]}"
-
-
-async def summarize_stream_async(limit: int = 30, concurrency: int = 1):
-    """Async generator variant: yields as soon as each summary finishes.
-
-    LLM calls run concurrently (I/O-bound) with a semaphore. DB commits happen
-    sequentially when each task completes, to avoid DB session concurrency issues.
+    New LLM replies are added to ``fresh`` for the caller to cache.
     """
-    # Collect target articles first in a sync context
-    with session_context() as session:
-        articles = session.exec(
-            select(Article).where(Article.summary == None).order_by(Article.published_at.desc())  # noqa: E711
-        ).all()
-
-    to_process = articles[:limit]
-    if not to_process:
-        return
-
-    if concurrency <= 1:
-        # Sequential async path
-        for art in to_process:
-            text = None
-            try:
-                text = await summarize_with_llm_async(art.title, art.description)
-            except Exception:
-                text = None
-            if not text:
-                text = summarize_extractive(art.title, art.description)
-            if text:
-                try:
-                    with session_context() as session:
-                        # Re-fetch to ensure current row
-                        row = session.get(Article, art.id)
-                        if row is None:
-                            continue
-                        row.summary = text
-                        session.add(row)
-                        session.commit()
-                    yield art.id, art.title or ""
-                except Exception as e:
-                    yield art.id, f"error: {str(e)[:60]}"
-        return
-
-    # Concurrent LLM calls; DB commits on completion
-    sem = asyncio.Semaphore(max(1, int(concurrency)))
-
-    async def _job(art: Article):
-        async with sem:
-            try:
-                text = await summarize_with_llm_async(art.title, art.description)
-                return art, text, None
-            except Exception as exc:
-                return art, None, exc
-
-    tasks = [asyncio.create_task(_job(art)) for art in to_process]
-    for coro in asyncio.as_completed(tasks):
-        art, text, err = await coro
-        if err is not None:
+    text = cached.get(row.id)
+    if text is None:
+        try:
+            text = await summarize_with_llm_async(row.title, row.description)
+        except Exception:
             text = None
-        if not text:
-            text = summarize_extractive(art.title, art.description)
         if text:
-            try:
-                with session_context() as session:
-                    row = session.get(Article, art.id)
-                    if row is None:
-                        continue
-                    row.summary = text
-                    session.add(row)
-                    session.commit()
-                yield art.id, art.title or ""
-            except Exception as e:
-                yield art.id, f"error: {str(e)[:60]}"
+            fresh[row.id] = text
+    try:
+        return row, text or summarize_extractive(row.title, row.description), None
+    except Exception as exc:
+        return row, None, exc
 
 
-def summarize_papers_stream(limit: int = 30, concurrency: int = 1):
-    with session_context() as session:
-        rows = session.exec(
-            select(Paper)
-            .where(Paper.summary == None)  # noqa: E711
-            .order_by(Paper.published_at.is_(None))
-            .order_by(Paper.published_at.desc())
-            .order_by(Paper.created_at.desc())
-        ).all()
-    # Reuse logic by mapping to Article-like objects
-    # We will process sequentially to keep patch minimal
-    processed = 0
-    for row in rows:
-        if processed >= limit:
-            break
+async def _summarize_all(rows, concurrency: int, cached: Dict[int, str], fresh: Dict[int, str]):
+    """Async iterator of _summarize_one results in completion order.
+
+    At most ``concurrency`` LLM calls are in flight; rows found in ``cached``
+    don't wait for a slot. Closing the iterator (or an unexpected failure)
+    cancels the calls still running and waits for them to stop, so ``fresh``
+    is final once it returns.
+    """
+    sem = asyncio.BoundedSemaphore(max(1, int(concurrency)))
+
+    async def _job(row):
+        if row.id in cached:
+            return await _summarize_one(row, cached, fresh)
+        async with sem:
+            return await _summarize_one(row, cached, fresh)
+
+    tasks = [asyncio.create_task(_job(row)) for row in rows]
+    try:
+        for fut in asyncio.as_completed(tasks):
+            yield await fut
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _record(updates: List[Tuple[int, str]], row, text: Optional[str], err: Optional[Exception]):
+    """Queue one result for saving; returns the (id, title) events to stream."""
+    if err is not None:
+        return [(row.id, f"error: {str(err)[:60]}")]
+    if text:
+        updates.append((row.id, text))
+        return [(row.id, row.title or "")]
+    return []
+
+
+def _committed(session, model, updates: List[Tuple[int, str]], events):
+    """Flush ``updates`` before their events go out, so a client that reloads
+    on an event finds the summary; rows that failed to save report an error."""
+    failed = set(_flush_summaries(session, model, updates))
+    return [(i, "error: save failed") if i in failed else (i, title) for i, title in events]
+
+
+def _drain(results: "queue.Queue", done: object, timeout: float) -> None:
+    """Discard queued results until ``done`` arrives or ``timeout`` runs out."""
+    deadline = time.monotonic() + timeout
+    while True:
         try:
-            text = summarize_with_llm_sync(row.title, row.description)
-            if not text:
-                text = summarize_extractive(row.title, row.description)
-            if text:
-                with session_context() as session:
-                    p = session.get(Paper, row.id)
-                    if not p:
-                        continue
-                    p.summary = text
-                    session.add(p)
-                    session.commit()
-                processed += 1
-                yield row.id, row.title or ""
-        except Exception as e:
-            yield row.id, f"error: {str(e)[:60]}"
+            if results.get(timeout=max(0.0, deadline - time.monotonic())) is done:
+                return
+        except queue.Empty:
+            print("[summarize] cancelled LLM calls did not stop in time")
+            return
 
 
-def summarize_news_stream(limit: int = 30, concurrency: int = 1):
+def _summarize_rows(model, limit: int = 30, concurrency: int = 1):
+    """Generator that summarizes pending rows of ``model`` and yields (id, title).
+
+    Shared by the Article / Paper / News streams. _summarize_all runs on the
+    shared event loop and hands each result back through a queue as soon as
+    it completes. DB work, including the LlmCache read and write, stays in
+    the current thread: results that have arrived are committed together
+    before their events are yielded.
+    """
     with session_context() as session:
-        rows = session.exec(
-            select(News)
-            .where(News.summary == None)  # noqa: E711
-            .order_by(News.published_at.is_(None))
-            .order_by(News.published_at.desc())
-            .order_by(News.created_at.desc())
-        ).all()
-    processed = 0
-    for row in rows:
-        if processed >= limit:
-            break
+        to_process = session.exec(_pending(model, limit)).all()
+        if not to_process:
+            return
+        keys, cached = _cached_summaries(to_process)
+        fresh: Dict[int, str] = {}
+        updates: List[Tuple[int, str]] = []
+        results: "queue.Queue" = queue.Queue()
+        done = object()
+
+        async def _pump():
+            try:
+                async for item in _summarize_all(to_process, concurrency, cached, fresh):
+                    results.put(item)
+            finally:
+                results.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(_pump(), aio.get_loop())
         try:
-            text = summarize_with_llm_sync(row.title, row.description)
-            if not text:
-                text = summarize_extractive(row.title, row.description)
-            if text:
-                with session_context() as session:
-                    n = session.get(News, row.id)
-                    if not n:
-                        continue
-                    n.summary = text
-                    session.add(n)
-                    session.commit()
-                processed += 1
-                yield row.id, row.title or ""
-        except Exception as e:
-            yield row.id, f"error: {str(e)[:60]}"
+            finished = False
+            while not finished:
+                items = [results.get()]
+                # Results that are already in share one commit
+                while items[-1] is not done:
+                    try:
+                        items.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+                finished = items[-1] is done
+                events = [event for item in items if item is not done for event in _record(updates, *item)]
+                yield from _committed(session, model, updates, events)
+        finally:
+            if not finished:
+                # Consumer went away early: stop the remaining LLM calls and wait
+                # for _pump's sentinel, so no task still writes to ``fresh``
+                future.cancel()
+                _drain(results, done, STREAM_CANCEL_TIMEOUT)
+            _flush_summaries(session, model, updates)
+            _cache_summaries(keys, fresh)
 
 
+def summarize_stream(limit: int = 30, concurrency: int = 1):
+    """Generator that summarizes pending articles and yields (id, title)."""
+    yield from _summarize_rows(Article, limit, concurrency)
+
+
+def summarize_papers_stream(limit: int = 30, concurrency: int = 1):
+    yield from _summarize_rows(Paper, limit, concurrency)
+
+
+def summarize_news_stream(limit: int = 30, concurrency: int = 1):
+    yield from _summarize_rows(News, limit, concurrency)
@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import Optional
 
+from fastapi import Response
+import orjson
 from pydantic import BaseModel
 
 
@@ -45,3 +47,16 @@ class NewsOut(BaseModel):
     class Config:
         orm_mode = True
 
+
+def out_columns(model, schema) -> list:
+    """Table columns for the fields of ``schema``, to select rows as plain mappings."""
+    return [getattr(model, name) for name in schema.model_fields]
+
+
+def rows_response(rows) -> Response:
+    """JSON list response for plain row mappings, serialized by orjson in one call.
+    No ORM objects are built, and returning a Response skips FastAPI's per-row
+    response_model validation (the endpoints keep response_model for the
+    OpenAPI schema).
+    """
+    return Response(orjson.dumps([dict(row) for row in rows]), media_type="application/json")
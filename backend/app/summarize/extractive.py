@@ -1,12 +1,19 @@
 from __future__ import annotations
 
+import logging
 import re
 from typing import Optional
 
+logger = logging.getLogger(__name__)
+
+_WS_RE = re.compile(r"\s+")
+_URL_RE = re.compile(r"https?://\S+")
+_SENT_RE = re.compile(r"(?<=[。！？.!?])\s+")
+
 
 def _clean(text: str) -> str:
-    text = re.sub(r"\s+", " ", text or "").strip()
-    text = re.sub(r"https?://\S+", "", text)
+    text = _WS_RE.sub(" ", text or "").strip()
+    text = _URL_RE.sub("", text)
     return text.strip()
 
 
@@ -17,10 +24,9 @@ def summarize_extractive(title: str, description: Optional[str]) -> Optional[str
     desc = _clean(description or "")
     if not desc:
         return title[:120]
-    sentences = re.split(r"(?<=[。！？.!?])\s+", desc)
+    # Only the first two sentences are kept, so stop splitting after them
+    sentences = _SENT_RE.split(desc, maxsplit=2)
     out = " ".join(sentences[:2]).strip()
     result = out[:180] if out else (title[:120] if title else None)
-    print(f"[summ.extract] title={title[:80]} len={len(result or '')}")
+    logger.debug("title=%s len=%d", title[:80], len(result or ""))
     return result
-
-
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from typing import Optional
-
-import httpx
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
 
+from .. import aio, llm_cache
 from ..config import get_settings
 
+logger = logging.getLogger(__name__)
+
 SUMMARY_PROMPT = (
     "你是新闻编辑，请用中文生成 2-3 句要点式摘要，聚焦新模型/方法/数据/指标，"
     "不超过 120 字。\n\n"
@@ -14,10 +18,27 @@ SUMMARY_PROMPT = (
 )
 
 
-async def _chat(prompt: str, timeout: float = 15.0) -> Optional[str]:
+# Shorter inputs go straight to the extractive summary: the LLM has nothing
+# to condense in a bare title or a one-line blurb (common for HN)
+MIN_DESCRIPTION_CHARS = 40
+MIN_INPUT_CHARS = 60
+
+# Process-lifetime counters, e.g. stats["skipped_short"]
+stats: Counter = Counter()
+
+
+def worth_llm(title: str, description: Optional[str]) -> bool:
+    desc = description or ""
+    if len(desc) < MIN_DESCRIPTION_CHARS or len(title or "") + len(desc) < MIN_INPUT_CHARS:
+        stats["skipped_short"] += 1
+        logger.debug("skip short input title=%s", (title or "")[:80])
+        return False
+    return True
+
+
+def _request(prompt: str) -> Tuple[str, dict, dict]:
     settings = get_settings()
     base_url = settings.ollama_base_url
-    api_key = None
 
     # Choose model (support Ollama by defaulting to llama3.1:8b on local URLs)
     model_name = settings.llm_model or "qwen2.5:7b"
@@ -32,39 +53,82 @@ async def _chat(prompt: str, timeout: float = 15.0) -> Optional[str]:
         "temperature": 0.2,
         "max_tokens": 200,
     }
-    url = f"{base_url}/chat/completions"
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            r = await client.post(url, headers=headers, json=payload)
-            r.raise_for_status()
-            data = r.json()
-            text = data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-            print(f"[summarize.llm] text={text!r}")
-            return text or None
-        except Exception:
-            return None
-
-
-def summarize_with_llm_sync(title: str, description: Optional[str]) -> Optional[str]:
-    import anyio
+    return f"{base_url}/chat/completions", headers, payload
 
-    prompt = SUMMARY_PROMPT.format(title=title, description=description or "")
 
-    async def _inner() -> Optional[str]:
-        return await _chat(prompt)
+def _parse(data: dict) -> Optional[str]:
+    text = data.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+    logger.debug("text=%r", text)
+    return text or None
+
 
+async def _chat(prompt: str, timeout: float = 15.0) -> Optional[str]:
+    """POST over the shared AsyncClient; must run on the aio loop."""
+    url, headers, payload = _request(prompt)
     try:
-        res = anyio.run(_inner)
-        return res if res else None
+        r = await aio.get_client().post(url, headers=headers, json=payload, timeout=timeout)
+        r.raise_for_status()
+        return _parse(r.json())
     except Exception:
         return None
 
 
+async def _chat_batch(prompts: Sequence[str], batch_size: int = 8, timeout: float = 15.0) -> List[Optional[str]]:
+    """Summaries for many prompts with up to ``batch_size`` requests in flight.
+
+    /chat/completions takes one conversation per request, so a batch is a set
+    of concurrent requests over the shared keep-alive pool. They all open with
+    the same system message, which lets a prompt-caching server reuse that
+    prefix. Results keep the input order. Must run on the aio loop.
+    """
+    sem = asyncio.Semaphore(max(1, batch_size))
+
+    async def _one(prompt: str) -> Optional[str]:
+        async with sem:
+            return await _chat(prompt, timeout=timeout)
+
+    return list(await asyncio.gather(*[_one(p) for p in prompts]))
+
+
+def summarize_with_llm_batch_sync(
+    items: Sequence[Tuple[str, Optional[str]]], batch_size: int = 8
+) -> List[Optional[str]]:
+    """Sync wrapper around _chat_batch; None marks items the LLM didn't summarize.
+    Cached summaries come from LlmCache; only the rest hit the LLM. Too-short
+    items are skipped (None).
+    """
+    prompts = [SUMMARY_PROMPT.format(title=t, description=d or "") for t, d in items]
+    if not prompts:
+        return []
+    eligible = [worth_llm(t, d) for t, d in items]
+    keys = [llm_cache.cache_key(p) for p in prompts]
+    cached = llm_cache.get_many([key for key, ok in zip(keys, eligible) if ok])
+    results: List[Optional[str]] = [cached.get(key) for key in keys]
+    missing = [i for i, text in enumerate(results) if text is None and eligible[i]]
+    if not missing:
+        return results
+    try:
+        texts = aio.run(_chat_batch, [prompts[i] for i in missing], batch_size)
+    except Exception:
+        return results
+    llm_cache.put_many({keys[i]: text for i, text in zip(missing, texts) if text})
+    for i, text in zip(missing, texts):
+        results[i] = text
+    return results
+
+
+def summary_cache_key(title: str, description: Optional[str]) -> str:
+    """LlmCache key of the summary prompt for one item."""
+    return llm_cache.cache_key(SUMMARY_PROMPT.format(title=title, description=description or ""))
+
+
 async def summarize_with_llm_async(title: str, description: Optional[str]) -> Optional[str]:
+    """Uncached: LlmCache is a sync DB call, so async callers read and write it
+    in batches off the loop (see summary_cache_key)."""
+    if not worth_llm(title, description):
+        return None
     prompt = SUMMARY_PROMPT.format(title=title, description=description or "")
     try:
-        return await _chat(prompt)
+        return await aio.call(_chat, prompt)
     except Exception:
         return None
-
-
@@ -1,7 +1,10 @@
 import os
-import html
+import time
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import streamlit as st
+from markupsafe import escape as _esc
 
 
 st.set_page_config(page_title="AI Algorithm News", layout="wide")
@@ -30,7 +33,25 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-def load_news(base_url: str, q: str, limit: int, offset: int = 0, source: str | None = None, domain: str | None = None, only_summarized: bool = False):
+@st.cache_resource
+def _http() -> requests.Session:
+    # One pooled session per Streamlit server: reruns reuse keep-alive connections
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    return s
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def _fetch_list(url: str, params: dict):
+    # Cached per (url, params); errors raise and are not cached
+    r = _http().get(url, params=params, timeout=30)
+    r.raise_for_status()
+    return orjson.loads(r.content)
+
+
+def load_news(base_url: str, q: str, limit: int, offset: int = 0, source: str | None = None, domain: str | None = None, only_summarized: bool = False, fresh: bool = False):
     try:
         params = {"limit": limit, "offset": offset, "q": q or ""}
         if source:
@@ -39,46 +60,80 @@ def load_news(base_url: str, q: str, limit: int, offset: int = 0, source: str |
             params["domain"] = domain
         if only_summarized:
             params["only_summarized"] = True
-        r = requests.get(f"{base_url}/api/news", params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        if fresh:
+            _fetch_list.clear()
+        return _fetch_list(f"{base_url}/api/news", params)
     except Exception as e:
         st.error(f"加载失败: {e}")
         return []
 
 
-def load_papers(base_url: str, q: str, limit: int, offset: int = 0):
+def load_papers(base_url: str, q: str, limit: int, offset: int = 0, fresh: bool = False):
     try:
         params = {"limit": limit, "offset": offset, "q": q or ""}
-        r = requests.get(f"{base_url}/api/papers", params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
+        if fresh:
+            _fetch_list.clear()
+        return _fetch_list(f"{base_url}/api/papers", params)
     except Exception as e:
         st.error(f"加载失败: {e}")
         return []
 
 
+_CARD_TMPL = (
+    "<div class='card'><div class='title'><a href='{url}' target='_blank'>{title}</a></div>"
+    "<div class='date'>{date}{source}</div>"
+    "<div class='summary'>{summary}</div></div>"
+).format
+
+
+def _card(a) -> str:
+    source = str(_esc(a.get('source','') or ""))
+    # fallback: summary -> description
+    text = (a.get('summary') or a.get('description') or "").strip()
+    return _CARD_TMPL(
+        url=a.get('url','') or "",
+        title=str(_esc(a.get('title','') or "")),
+        date=str(_esc(str(a.get('published_at','') or ""))),
+        source=(' · ' + source) if source else '',
+        summary=str(_esc(text)),
+    )
+
+
 def render_cards(ph, data):
-    cards = []
-    for a in data:
-        title = html.escape(a.get('title','') or "")
-        url = a.get('url','') or ""
-        date = html.escape(str(a.get('published_at','') or ""))
-        # fallback: summary -> description
-        text = (a.get('summary') or a.get('description') or "").strip()
-        summary = html.escape(text)
-        source = html.escape(a.get('source','') or "")
-        cards.append(
-            f"<div class='card'><div class='title'><a href='{url}' target='_blank'>{title}</a></div>"
-            f"<div class='date'>{date}{(' · ' + source) if source else ''}</div>"
-            f"<div class='summary'>{summary}</div></div>"
-        )
-    ph.markdown("".join(cards), unsafe_allow_html=True)
+    ph.markdown("".join([_card(a) for a in data]), unsafe_allow_html=True)
+
+def _sse_messages(resp):
+    """Yield the data of each SSE frame, split on blank lines from 8 KB chunks."""
+    if not resp.encoding:
+        resp.encoding = "utf-8"
+    buf = ""
+    for chunk in resp.iter_content(chunk_size=8192, decode_unicode=True):
+        buf += chunk
+        if "\n\n" not in buf:
+            continue
+        *frames, buf = buf.split("\n\n")
+        for frame in frames:
+            for line in frame.split("\n"):
+                if line.startswith("data: "):
+                    yield line[6:]
+
+
+# Minimum seconds between list reloads while an SSE refresh is streaming
+RENDER_INTERVAL = 1.0
+
+
+def _should_render(msg: str, last_render: float) -> bool:
+    if msg == "done":
+        return True
+    if msg.startswith("summarized #") or msg.startswith("summarized total"):
+        return time.monotonic() - last_render >= RENDER_INTERVAL
+    return False
+
 
 @st.cache_data(ttl=300)
 def load_news_sources(base_url: str):
     try:
-        r = requests.get(f"{base_url}/api/news/sources", timeout=15)
+        r = _http().get(f"{base_url}/api/news/sources", timeout=15)
         r.raise_for_status()
         return r.json()
     except Exception:
@@ -146,6 +201,7 @@ with tab_papers:
     # 将抓取按钮上移至列表上方，移除“加载更多论文”
     trigger_refresh_papers = st.button("抓取论文并摘要")
     if st.button("刷新论文列表"):
+        _fetch_list.clear()
         st.rerun()
     ph_papers = st.empty()
     data_papers = load_papers(base_url, q_p, int(limit), 0)
@@ -160,6 +216,7 @@ with tab_news:
     # 抓取按钮上移至列表上方
     trigger_refresh_news = st.button("抓取资讯并摘要")
     if st.button("刷新资讯列表"):
+        _fetch_list.clear()
         st.rerun()
     ph_news = st.empty()
     data_news = load_news(base_url, q_n, int(limit), 0, source or None, None, only_sum)
@@ -171,7 +228,7 @@ with st.container():
             try:
                 # 使用 SSE 流式进度
                 with st.spinner("抓取与摘要进行中..."):
-                    with requests.get(
+                    with _http().get(
                         f"{base_url}/api/papers/refresh/stream",
                         params={
                             "token": admin_token,
@@ -186,16 +243,16 @@ with st.container():
                         if resp.status_code != 200:
                             st.error(f"刷新失败: {resp.status_code}")
                         partial = []
-                        for line in resp.iter_lines(decode_unicode=True):
-                            if not line:
-                                continue
-                            if line.startswith("data: "):
-                                msg = line[6:]
-                                st.write(msg)
-                                # 增量刷新：每次完成一条摘要时，重新加载并渲染列表
-                                if msg.startswith("summarized #") or msg.startswith("summarized total") or msg == "done":
-                                    data_papers = load_papers(base_url, q_p, int(limit), 0)
-                                    render_cards(ph_papers, data_papers)
+                        last_render = 0.0
+                        for msg in _sse_messages(resp):
+                            st.write(msg)
+                            # 增量刷新：完成摘要时重新加载并渲染列表（最多每秒一次，done 时必刷新）
+                            if _should_render(msg, last_render):
+                                last_render = time.monotonic()
+                                # Summaries changed server-side: bypass the list cache
+                                data_papers = load_papers(base_url, q_p, int(limit), 0, fresh=True)
+                                render_cards(ph_papers, data_papers)
+                _fetch_list.clear()
                 st.success("完成")
                 st.rerun()
             except Exception as e:
@@ -208,7 +265,7 @@ with st.container():
     if 'trigger_refresh_news' in locals() and trigger_refresh_news:
             try:
                 with st.spinner("抓取与摘要进行中..."):
-                    with requests.get(
+                    with _http().get(
                         f"{base_url}/api/news/refresh/stream",
                         params={
                             "token": admin_token,
@@ -225,15 +282,15 @@ with st.container():
                     ) as resp:
                         if resp.status_code != 200:
                             st.error(f"刷新失败: {resp.status_code}")
-                        for line in resp.iter_lines(decode_unicode=True):
-                            if not line:
-                                continue
-                            if line.startswith("data: "):
-                                msg = line[6:]
-                                st.write(msg)
-                                if msg.startswith("summarized #") or msg.startswith("summarized total") or msg == "done":
-                                    data_news = load_news(base_url, q_n, int(limit), 0, source or None, None, only_sum)
-                                    render_cards(ph_news, data_news)
+                        last_render = 0.0
+                        for msg in _sse_messages(resp):
+                            st.write(msg)
+                            if _should_render(msg, last_render):
+                                last_render = time.monotonic()
+                                data_news = load_news(base_url, q_n, int(limit), 0, source or None, None, only_sum, fresh=True)
+                                render_cards(ph_news, data_news)
+                _fetch_list.clear()
+                load_news_sources.clear()
                 st.success("完成")
                 st.rerun()
             except Exception as e:
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Settings and the engine are cached on first use, so point them at a
+# throwaway database before any app module is imported
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+os.environ.setdefault("ENABLE_LLM_FILTER", "false")
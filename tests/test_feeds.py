@@ -0,0 +1,41 @@
+import io
+
+from backend.app.ingest.feeds import parse_feed
+
+FEED_URL = "https://feeds.example.org/dir/feed.xml"
+
+RSS = b"""<?xml version="1.0"?>
+<rss version="2.0"><channel><title>T</title>
+<item>
+  <title>Scripted</title>
+  <link>/posts/a</link>
+  <description>&lt;p onclick="steal()"&gt;Hi &lt;a href="/r"&gt;r&lt;/a&gt;&lt;script&gt;alert(1)&lt;/script&gt;&lt;/p&gt;</description>
+</item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:base="https://blog.example.com/base/"><title>F</title>
+<entry>
+  <title>Relative</title>
+  <link href="x.html"/>
+  <content type="xhtml"><div xmlns="http://www.w3.org/1999/xhtml"><p>ok</p><script>bad()</script><img src="i.png"/></div></content>
+</entry>
+</feed>"""
+
+
+def test_fast_path_sanitizes_summary_html():
+    entry = parse_feed(io.BytesIO(RSS), FEED_URL).entries[0]
+    assert "script" not in entry.summary
+    assert "alert" not in entry.summary
+    assert "onclick" not in entry.summary
+    assert entry.summary == '<p>Hi <a href="https://feeds.example.org/r">r</a></p>'
+
+
+def test_fast_path_resolves_relative_links():
+    rss_entry = parse_feed(io.BytesIO(RSS), FEED_URL).entries[0]
+    assert rss_entry.link == "https://feeds.example.org/posts/a"
+
+    atom_entry = parse_feed(io.BytesIO(ATOM), FEED_URL).entries[0]
+    assert atom_entry.link == "https://blog.example.com/base/x.html"
+    assert "bad()" not in atom_entry.summary
+    assert 'src="https://blog.example.com/base/i.png"' in atom_entry.summary
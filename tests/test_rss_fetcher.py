@@ -0,0 +1,29 @@
+import backend.app.models  # noqa: F401  (registers the tables)
+from backend.app.db import create_db_and_tables
+from backend.app.ingest import rss_fetcher
+from backend.app.ingest.rss_sources import DEFAULT_RSS_SOURCES
+
+
+def _record_fetches(monkeypatch):
+    requested = []
+
+    def fake_fetch_feeds(urls, consumer, cutoff=None, max_connections=32):
+        requested.append(list(urls))
+        return []
+
+    monkeypatch.setattr(rss_fetcher, "fetch_feeds", fake_fetch_feeds)
+    return requested
+
+
+def test_empty_sources_fetch_nothing(monkeypatch):
+    create_db_and_tables()
+    requested = _record_fetches(monkeypatch)
+    assert rss_fetcher.fetch_rss_sources(sources=[]) == []
+    assert requested == [[]]
+
+
+def test_none_sources_use_defaults(monkeypatch):
+    create_db_and_tables()
+    requested = _record_fetches(monkeypatch)
+    rss_fetcher.fetch_rss_sources(sources=None)
+    assert requested == [list(DEFAULT_RSS_SOURCES)]